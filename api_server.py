@@ -1,14 +1,22 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from core.chemical_info import ChemicalInfoRetriever
+from core.cache_warmup import CacheWarmer
+from core.artifact_writer import ArtifactWriter
 from core.ocr_processing import OCRProcessor
+from core.profiling import (activate, begin_profile, bind_profile, current_profile, deactivate,
+                            end_profile, profile_store, should_profile, span)
+from config.settings import PROFILING_CONFIG, WARMUP_CONFIG
 import cv2
 import numpy as np
+import hmac
 import io
+import json
 import os
 import logging
 import time
+import uuid
 from typing import Dict, Optional
 import uvicorn
 from datetime import datetime
@@ -29,6 +37,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """按请求头、查询参数或采样率对请求进行剖析"""
+    flag = (request.headers.get(PROFILING_CONFIG["header"])
+            or request.query_params.get(PROFILING_CONFIG["query_param"]))
+    if request.url.path.startswith("/api/admin/") or not should_profile(flag):
+        return await call_next(request)
+
+    # cProfile开销较大，仅允许携带管理员令牌的请求开启
+    use_cprofile = (flag or "").lower() == "cpu" and _is_admin(request.headers.get("X-Admin-Token"))
+    profile = begin_profile(f"{request.method} {request.url.path}", use_cprofile)
+    token = activate(profile)
+    try:
+        response = await call_next(request)
+    except Exception:
+        end_profile(profile)
+        raise
+    finally:
+        deactivate(token)
+
+    # 流式响应的主体在call_next返回后才生成，待主体发送完毕再结束剖析
+    body_iterator = response.body_iterator
+
+    async def finish_after_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            end_profile(profile)
+
+    response.body_iterator = finish_after_body()
+    response.headers["X-Profile-Id"] = profile.id
+    return response
+
+def _is_admin(token: Optional[str]) -> bool:
+    """未配置admin_token时管理功能一律关闭"""
+    expected = PROFILING_CONFIG["admin_token"]
+    # 按字节比较：compare_digest不接受含非ASCII字符的str
+    return bool(expected) and token is not None and hmac.compare_digest(token.encode(), expected.encode())
+
 # 初始化处理器
 chemical_info = ChemicalInfoRetriever()
 ocr_processor = OCRProcessor()
@@ -37,6 +85,22 @@ ocr_processor = OCRProcessor()
 os.makedirs("input", exist_ok=True)
 os.makedirs("output", exist_ok=True)
 
+cache_warmer = CacheWarmer(chemical_info)
+artifact_writer = ArtifactWriter()
+
+@app.on_event("startup")
+async def start_background_workers():
+    """启动后台文件持久化和缓存预热"""
+    artifact_writer.start()
+    if WARMUP_CONFIG["enabled"]:
+        cache_warmer.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    cache_warmer.stop()
+    # 写完队列中剩余的文件
+    artifact_writer.stop()
+
 @app.get("/")
 async def root():
     """健康检查接口"""
@@ -57,12 +121,12 @@ async def process_image(
         
         # 实时模式下不保存文件
         if not is_realtime:
-            # 生成唯一的文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            input_filename = f"input_{timestamp}.jpg"
-            output_filename = f"output_{timestamp}.txt"
+            # 生成唯一的文件名（同一秒内的多次上传以微秒和随机后缀区分）
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            suffix = uuid.uuid4().hex[:8]
+            input_filename = f"input_{timestamp}_{suffix}.jpg"
+            output_filename = f"output_{timestamp}_{suffix}.txt"
             
-            # 保存上传的图片
             input_path = os.path.join("input", input_filename)
             output_path = os.path.join("output", output_filename)
             logger.info(f"Processing file: {file.filename}")
@@ -71,30 +135,32 @@ async def process_image(
             # 读取上传的图片内容
             contents = await file.read()
             
-            if not is_realtime:
-                with open(input_path, "wb") as f:
-                    f.write(contents)
-            
             # 将二进制内容转换为OpenCV格式
-            nparr = np.frombuffer(contents, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            with span("imdecode"):
+                nparr = np.frombuffer(contents, np.uint8)
+                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
             
             if image is None:
                 raise HTTPException(status_code=400, detail="Invalid image file")
             
             # OCR处理
             logger.info("Starting OCR processing")
-            text = ocr_processor.process_image(image)
+            with span("ocr"):
+                text = ocr_processor.process_image(image)
             logger.info(f"OCR result: {text}")
             
             if not is_realtime:
-                # 保存OCR结果
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(text)
+                # 图片和OCR结果交由后台线程写入，请求无需等待磁盘I/O；
+                # 队列已满而被丢弃的文件不在响应中返回
+                if not artifact_writer.submit(input_path, contents, image):
+                    input_filename = None
+                if not artifact_writer.submit(output_path, text.encode("utf-8")):
+                    output_filename = None
             
             # 获取化学品信息
             logger.info("Getting chemical information")
-            info = chemical_info.get_chemical_info(text)
+            with span("chemical_info"):
+                info = chemical_info.get_chemical_info(text)
             
             if not info:
                 return JSONResponse(
@@ -112,7 +178,8 @@ async def process_image(
                 )
             
             # 格式化信息
-            formatted_info = chemical_info.format_info(info)
+            with span("format_info"):
+                formatted_info = chemical_info.format_info(info)
             
             return {
                 "status": "success",
@@ -127,23 +194,53 @@ async def process_image(
             
         except Exception as e:
             logger.error(f"Error processing file: {str(e)}")
-            if not is_realtime and 'input_path' in locals():
-                if os.path.exists(input_path):
-                    os.remove(input_path)
-                if os.path.exists(output_path):
-                    os.remove(output_path)
             raise HTTPException(status_code=500, detail=str(e))
             
     except Exception as e:
         logger.error(f"Error in process_image: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/process/image/stream")
+async def process_image_stream(file: UploadFile = File(...)) -> StreamingResponse:
+    """处理上传的图片，以NDJSON逐行返回化学品信息字段（不保存文件）"""
+    if not file.content_type.startswith('image/'):
+        raise HTTPException(status_code=400, detail="Only image files are allowed")
+
+    contents = await file.read()
+    nparr = np.frombuffer(contents, np.uint8)
+    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if image is None:
+        raise HTTPException(status_code=400, detail="Invalid image file")
+
+    logger.info("Starting OCR processing")
+    text = ocr_processor.process_image(image)
+    logger.info(f"OCR result: {text}")
+
+    def generate():
+        yield json.dumps({"event": "ocr", "ocr_text": text}, ensure_ascii=False) + "\n"
+        info = {}
+        for key, value in chemical_info.stream_chemical_info(text):
+            info[key] = value
+            yield json.dumps({"event": "field", "key": key, "value": value}, ensure_ascii=False) + "\n"
+        yield json.dumps({
+            "event": "done",
+            "status": "success",
+            "data": {
+                "ocr_text": text,
+                "chemical_info": info,
+                "formatted_info": chemical_info.format_info(info) if info else "未识别到化学品信息"
+            }
+        }, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(bind_profile(generate(), current_profile()), media_type="application/x-ndjson")
+
 @app.get("/api/files/list")
 async def list_files() -> Dict:
     """列出input和output文件夹中的文件"""
     try:
-        input_files = os.listdir("input")
-        output_files = os.listdir("output")
+        # 忽略后台写入中的临时文件
+        input_files = [f for f in os.listdir("input") if not f.endswith(".tmp")]
+        output_files = [f for f in os.listdir("output") if not f.endswith(".tmp")]
         return {
             "status": "success",
             "data": {
@@ -186,5 +283,41 @@ async def cleanup_files() -> Dict:
         logger.error(f"Error cleaning up files: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _check_admin_token(token: Optional[str]):
+    if not _is_admin(token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.get("/api/admin/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(None)) -> Dict:
+    """列出最近的请求剖析结果"""
+    _check_admin_token(x_admin_token)
+    return {
+        "status": "success",
+        "data": {
+            "profiles": profile_store.list()
+        }
+    }
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)) -> Dict:
+    """获取单次请求的阶段耗时和cProfile结果"""
+    _check_admin_token(x_admin_token)
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {
+        "status": "success",
+        "data": profile
+    }
+
+@app.get("/api/admin/cache")
+async def cache_status(x_admin_token: Optional[str] = Header(None)) -> Dict:
+    """查看化学品信息缓存的命中统计"""
+    _check_admin_token(x_admin_token)
+    return {
+        "status": "success",
+        "data": chemical_info.cache_stats()
+    }
+
 if __name__ == "__main__":
     uvicorn.run("api_server:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""对比完整模式与紧凑模式的提示构建开销
+
+用法（在项目根目录下）:
+    python benchmarks/bench_prompt.py            # 离线对比估算的输入token数、输出上限和构建耗时
+    python benchmarks/bench_prompt.py --live 5   # 额外对每种模式实际请求模型5次，
+                                                 # 对比延迟、usage中的实际token数和输出内容条数
+
+离线结果只是按估算输入token加输出上限计算的预算，实际延迟和输出长度以 --live 为准。
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import LM_CONFIG, PROMPT_CONFIG
+from core.prompt_builder import CHEMICAL_FULL_PROMPT, CHEMICAL_TEMPLATES, estimate_tokens
+
+# 模拟的OCR输出：短标签、带噪声的长标签
+SAMPLES = [
+    "无水乙醇 Ethanol absolute CAS 64-17-5 AR 500ml",
+    "盐酸 Hydrochloric acid 36%~38% CAS:7647-01-0 ---- 腐蚀性 ****  "
+    + "本品对皮肤和眼睛有强烈刺激作用 " * 20
+    + "生产日期 2023-05-01 批号 20230501 " * 10,
+    "  丙酮\n\nAcetone\t\tCAS 67-64-1 !!!!!! 易燃液体 " + "注意事项：远离火源，密封保存。 " * 40,
+]
+
+
+def bench_render(render, text, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render(text)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def run_offline(rounds):
+    print(f"{'样本':<6}{'模式':<10}{'输入token':>10}{'输出上限':>10}{'构建耗时(us)':>14}")
+    totals = {"legacy": 0, "full": 0, "compact": 0}
+    for i, text in enumerate(SAMPLES, 1):
+        legacy_system = CHEMICAL_TEMPLATES["full"].system
+        legacy_prompt = CHEMICAL_FULL_PROMPT.format(text)
+        rows = [(
+            "legacy",
+            estimate_tokens(legacy_system + legacy_prompt),
+            LM_CONFIG["max_tokens"],
+            bench_render(CHEMICAL_FULL_PROMPT.format, text, rounds)
+        )]
+        for mode, template in CHEMICAL_TEMPLATES.items():
+            rendered = template.render(text)
+            rows.append((
+                mode,
+                estimate_tokens((template.system or "") + rendered),
+                template.max_tokens,
+                bench_render(template.render, text, rounds)
+            ))
+        for mode, tokens, max_tokens, us in rows:
+            totals[mode] += tokens + max_tokens
+            print(f"{i:<6}{mode:<10}{tokens:>10}{max_tokens:>10}{us:>14.1f}")
+    print()
+    for mode, total in totals.items():
+        print(f"{mode:<10}估算输入+输出上限合计 {total} token（相对legacy {total / totals['legacy']:.0%}）")
+
+
+def run_live(n):
+    """实际请求模型，统计延迟、usage中的token数和各列表字段的条数"""
+    from core.chemical_info import ChemicalInfoRetriever
+    from core.json_stream import IncrementalJSONParser
+    from core.prompt_builder import expand_compact
+
+    retriever = ChemicalInfoRetriever()
+    url = f"{retriever.api_url}{LM_CONFIG['api_endpoint']}"
+    list_fields = ("main_hazards", "safety_measures", "first_aid", "storage")
+
+    print(f"{'模式':<10}{'中位延迟(ms)':>14}{'最大延迟(ms)':>14}{'输入token':>10}{'输出token':>10}{'完整率':>8}  列表平均条数")
+    for mode, template in CHEMICAL_TEMPLATES.items():
+        latencies, prompt_tokens, completion_tokens, complete = [], [], [], 0
+        items = {field: [] for field in list_fields}
+        for i in range(n):
+            text = SAMPLES[i % len(SAMPLES)]
+            payload = retriever._build_payload(template, text, stream=False)
+            start = time.perf_counter()
+            response = retriever.session.post(url, headers=retriever.headers, json=payload,
+                                              timeout=(10, LM_CONFIG["timeout"]))
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+            result = response.json()
+            usage = result.get("usage", {})
+            prompt_tokens.append(usage.get("prompt_tokens", 0))
+            completion_tokens.append(usage.get("completion_tokens", 0))
+
+            parser = IncrementalJSONParser()
+            parser.feed(result["choices"][0]["message"]["content"])
+            info = parser.close() or {}
+            if template.compact:
+                info = expand_compact(info)
+            complete += parser.complete
+            for field in list_fields:
+                items[field].append(len(info.get(field) or []))
+
+        counts = " ".join(f"{field}={statistics.mean(v):.1f}" for field, v in items.items())
+        print(f"{mode:<10}{statistics.median(latencies):>14.0f}{max(latencies):>14.0f}"
+              f"{statistics.mean(prompt_tokens):>10.0f}{statistics.mean(completion_tokens):>10.0f}"
+              f"{complete / n:>8.0%}  {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000, help="离线构建耗时的重复次数")
+    parser.add_argument("--live", type=int, default=0, help="每种模式实际请求模型的次数")
+    args = parser.parse_args()
+
+    run_offline(args.rounds)
+    if args.live:
+        run_live(args.live)
+
+
+if __name__ == "__main__":
+    main()
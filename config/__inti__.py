@@ -5,5 +5,10 @@ __all__ = [
     "YOLO_CONFIG",
     "OCR_CONFIG",
     "LM_CONFIG",
+    "PROMPT_CONFIG",
+    "CACHE_CONFIG",
+    "WARMUP_CONFIG",
+    "PERSIST_CONFIG",
+    "PROFILING_CONFIG",
     "INSTRUCTION_TEMPLATES"
 ]
@@ -18,7 +18,11 @@ YOLO_CONFIG = {
     # "model_path": r"D:\AI_Models\YOLO-LM-System\detection\yolov8n.pt",
     
     "confidence_threshold": 0.3,  # Lower threshold for test image
-    "device": "cpu"
+    "device": "cpu",
+
+    # 推理参数
+    "imgsz": 640,      # 模型输入尺寸
+    "batch_size": 8    # detect_batch 每批图片数
 }
 
 OCR_CONFIG = {
@@ -47,6 +51,63 @@ LM_CONFIG = {
     "stream": False
 }
 
+# 提示构建配置
+PROMPT_CONFIG = {
+    # 化学品信息查询模板: full(完整JSON骨架) / compact(短键紧凑模式)。
+    # compact会精简返回内容，需先用 benchmarks/bench_prompt.py --live 确认实际收益后再切换
+    "mode": "full",
+    "input_token_budget": 256,    # OCR文本的token预算，超出部分截断
+    "max_tokens": {               # 各模板的输出token上限
+        "full": 512,
+        "compact": 320
+    }
+}
+
+# 化学品信息缓存配置
+CACHE_CONFIG = {
+    "max_size": 1000,       # 最大缓存条目数
+    "ttl": 7 * 86400,       # 过期时间（秒）
+    # 常用化学品清单文件路径，可选。每行一种化学品，逗号分隔名称、别名和CAS号，
+    # 例如 "乙醇,无水乙醇,Ethanol,64-17-5"。用于从OCR文本识别化学品作为缓存键，并参与预热
+    "curated_list": None
+}
+
+# 缓存预热配置
+WARMUP_CONFIG = {
+    "enabled": True,
+    "output_dir": str(BASE_DIR / "output"),  # 历史OCR结果目录
+    "file_pattern": "output_*.txt",
+    "top_n": 50,            # 最多预热的条目数
+    "min_count": 2,         # 同一化学品在历史结果中至少出现的次数
+    "min_interval": 2.0,    # 相邻两次模型请求的最小间隔（秒）
+    "interval": 0           # 重复预热的间隔（秒），0表示仅启动时执行一次
+}
+
+# 文件持久化配置（后台写入input/output）
+PERSIST_CONFIG = {
+    "queue_size": 256,          # 待写入队列容量，写满时立即丢弃新文件（入队不等待，避免阻塞事件循环）
+    "batch_size": 32,           # 每批最多写入的文件数
+    "fsync": True,              # 重命名前fsync文件，批次结束后fsync目录
+    "archive_dir": None,        # 归档副本目录（缩小并重新编码的图片），None表示不归档
+    "archive_max_side": 1024,   # 归档图片最长边像素
+    "archive_quality": 80       # 归档图片JPEG质量
+}
+
+# 请求剖析配置
+PROFILING_CONFIG = {
+    "enabled": True,
+    "sample_rate": 0.0,           # 随机采样比例，0表示仅在显式请求时剖析
+    # 请求头触发: 1/trace 仅记录阶段耗时, cpu 额外采集cProfile（需管理员令牌）。
+    # cProfile只采集事件循环线程，不含线程池中的工作（如流式接口的模型请求），
+    # 且会混入同时段其他请求的调用，此时以阶段耗时为准
+    "header": "X-Profile",
+    "query_param": "profile",     # 查询参数触发，取值同上
+    "buffer_size": 100,           # 环形缓冲区容量
+    "cprofile_top_n": 40,         # cProfile结果保留的函数条数
+    # 管理员令牌：访问 /api/admin/* 及开启cProfile需携带 X-Admin-Token，未配置时这些功能关闭
+    "admin_token": os.environ.get("CHEM_ADMIN_TOKEN", "")
+}
+
 # 指令模板
 INSTRUCTION_TEMPLATES = {
     "default": "请分析以下文本内容: {}",
@@ -55,13 +116,14 @@ INSTRUCTION_TEMPLATES = {
     "liquid": "请分析以下液体化学品标签，提供其物理化学性质、相容性、泄漏处理和急救措施: {}"
 }
 
-# 路径有效性验证
+# 路径有效性验证（设置环境变量 CHEM_SKIP_MODEL_CHECK=1 可跳过，供测试等无需模型的场景使用）
 _required_paths = [
     YOLO_CONFIG["model_path"],
     Path(OCR_CONFIG["rec_model_dir"]),
     Path(OCR_CONFIG["det_model_dir"]),
 ]
 
-for path in _required_paths:
-    if not path.exists():
-        raise FileNotFoundError(f"关键模型文件缺失：{path}")
+if os.environ.get("CHEM_SKIP_MODEL_CHECK") != "1":
+    for path in _required_paths:
+        if not path.exists():
+            raise FileNotFoundError(f"关键模型文件缺失：{path}")
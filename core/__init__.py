@@ -1,11 +1,18 @@
-from .detection import YOLODetector
-from .ocr_processing import OCRProcessor
-from .instruction_manager import InstructionManager
-from .lm_query import LMClient
-
-__all__ = [
-    "YOLODetector",
-    "OCRProcessor",
-    "InstructionManager",
-    "LMClient"
-]
+import importlib
+
+# 按需导入：json_stream、prompt_builder等纯Python模块不依赖YOLO/PaddleOCR，
+# 导入 core.<子模块> 时不应加载整个模型栈
+_EXPORTS = {
+    "YOLODetector": ".detection",
+    "OCRProcessor": ".ocr_processing",
+    "InstructionManager": ".instruction_manager",
+    "LMClient": ".lm_query"
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,170 @@
+import logging
+import os
+import queue
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config.settings import PERSIST_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ArtifactWriter:
+    """后台持久化上传图片和OCR结果
+
+    请求处理只负责入队；后台线程按批写入临时文件、统一fsync后原子重命名，
+    并可选地保存缩小、重新编码后的归档副本。
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = config or PERSIST_CONFIG
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.config["queue_size"])
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """写完队列中剩余的内容后停止"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, path: str, data: bytes, image: Optional[np.ndarray] = None) -> bool:
+        """提交一个待写入的文件，队列已满时丢弃并返回False
+
+        image为已解码的图片时，额外写入归档副本。
+        """
+        if not self.config["archive_dir"]:
+            # 不归档时不在队列中保留解码后的图片
+            image = None
+        # 在事件循环中调用，不能阻塞等待
+        try:
+            self._queue.put_nowait((path, data, image))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"持久化队列已满，丢弃文件: {path}")
+            return False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+            # 取出队列中已有的内容合并为一批
+            while len(batch) < self.config["batch_size"]:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    continue
+                batch.append(item)
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    logger.error(f"文件持久化失败: {str(e)}")
+
+    def _write_batch(self, batch: List[Tuple[str, bytes, Optional[np.ndarray]]]):
+        files = []
+        for path, data, image in batch:
+            files.append((path, data))
+            try:
+                archive = self._archive_copy(path, image)
+            except Exception as e:
+                logger.error(f"生成归档副本失败 {path}: {str(e)}")
+                archive = None
+            if archive is not None:
+                files.append(archive)
+
+        # 先写临时文件，统一fsync后再重命名，避免出现写了一半的文件；
+        # 每个文件单独处理，一个失败不影响同批次的其他文件
+        written = []
+        for path, data in files:
+            tmp_path = self._write_temp(path, data)
+            if tmp_path is not None:
+                written.append((tmp_path, path))
+
+        dirs = set()
+        for tmp_path, path in written:
+            try:
+                os.replace(tmp_path, path)
+                dirs.add(os.path.dirname(path) or ".")
+            except OSError as e:
+                logger.error(f"重命名文件失败 {path}: {str(e)}")
+                self._remove(tmp_path)
+
+        if self.config["fsync"] and hasattr(os, "O_DIRECTORY"):
+            for d in dirs:
+                try:
+                    fd = os.open(d, os.O_RDONLY | os.O_DIRECTORY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError as e:
+                    logger.error(f"目录fsync失败 {d}: {str(e)}")
+
+    def _write_temp(self, path: str, data: bytes) -> Optional[str]:
+        """在目标目录中写入唯一命名的临时文件，失败时返回None"""
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(path) or ".",
+                prefix=f".{os.path.basename(path)}.",
+                suffix=".tmp"
+            )
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                if self.config["fsync"]:
+                    f.flush()
+                    os.fsync(f.fileno())
+            return tmp_path
+        except OSError as e:
+            logger.error(f"写入文件失败 {path}: {str(e)}")
+            if tmp_path is not None:
+                self._remove(tmp_path)
+            return None
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _archive_copy(self, path: str, image: Optional[np.ndarray]) -> Optional[Tuple[str, bytes]]:
+        """生成缩小并重新编码的归档副本"""
+        archive_dir = self.config["archive_dir"]
+        if image is None or not archive_dir:
+            return None
+        h, w = image.shape[:2]
+        scale = self.config["archive_max_side"] / max(h, w)
+        if scale < 1:
+            image = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.config["archive_quality"]])
+        if not ok:
+            logger.warning(f"归档副本编码失败: {path}")
+            return None
+        os.makedirs(archive_dir, exist_ok=True)
+        name = os.path.splitext(os.path.basename(path))[0] + ".jpg"
+        return os.path.join(archive_dir, name), buf.tobytes()
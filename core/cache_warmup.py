@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import WARMUP_CONFIG
+from .chemical_info import ChemicalInfoRetriever
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """从历史OCR结果和常用化学品清单中挑选高频化学品，后台预先填充查询缓存"""
+
+    def __init__(self, retriever: ChemicalInfoRetriever, config: Optional[dict] = None):
+        self.retriever = retriever
+        self.config = config or WARMUP_CONFIG
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _mine_history(self) -> Tuple[Counter, Dict[str, str]]:
+        """按缓存键统计历史OCR输出中各化学品的出现次数，并为每个键保留一段原文用于查询"""
+        counts = Counter()
+        samples = {}
+        output_dir = Path(self.config["output_dir"])
+        if not output_dir.is_dir():
+            return counts, samples
+        for path in output_dir.glob(self.config["file_pattern"]):
+            try:
+                text = path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                logger.debug(f"跳过文件 {path}: {str(e)}")
+                continue
+            if not text.strip():
+                continue
+            key = self.retriever.cache_key(text)
+            counts[key] += 1
+            samples.setdefault(key, text)
+        return counts, samples
+
+    def collect_candidates(self) -> List[str]:
+        """常用清单在前，其后按历史出现频率排序，总数不超过top_n"""
+        candidates = []
+        seen = set()
+        counts, samples = self._mine_history()
+        frequent = [samples[key] for key, n in counts.most_common() if n >= self.config["min_count"]]
+        for text in self.retriever.identifier.queries() + frequent:
+            key = self.retriever.cache_key(text)
+            if key in seen:
+                continue
+            seen.add(key)
+            candidates.append(text)
+            if len(candidates) >= self.config["top_n"]:
+                break
+        return candidates
+
+    def run_once(self) -> int:
+        """按速率限制依次解析候选项，返回新写入缓存的条目数"""
+        candidates = self.collect_candidates()
+        logger.info(f"缓存预热开始，候选项 {len(candidates)} 个")
+        warmed = 0
+        for text in candidates:
+            if self._stop.is_set():
+                break
+            if self.retriever.is_cached(text):
+                continue
+            started = time.monotonic()
+            if self.retriever.warm(text):
+                warmed += 1
+            # 限制请求速率，避免挤占线上请求的模型配额
+            remaining = self.config["min_interval"] - (time.monotonic() - started)
+            if remaining > 0 and self._stop.wait(remaining):
+                break
+        logger.info(f"缓存预热完成，新增 {warmed} 条")
+        return warmed
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"缓存预热失败: {str(e)}")
+            interval = self.config["interval"]
+            if interval <= 0 or self._stop.wait(interval):
+                break
+
+    def start(self):
+        """在后台线程中执行预热；interval>0时定期重复"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
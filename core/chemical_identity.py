@@ -0,0 +1,99 @@
+import logging
+import re
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# CAS号: 2-7位数字-2位数字-1位校验位，允许OCR识别出的各种横线和空格
+CAS_RE = re.compile(r"(?<!\d)(\d{2,7})\s*[-‐‑–—－]\s*(\d{2})\s*[-‐‑–—－]\s*(\d)(?!\d)")
+
+# CJK统一汉字（含扩展A区和兼容区），用于界定中文名称的边界
+_CJK = "\u3400-\u9fff\uf900-\ufaff"
+
+
+def is_valid_cas(cas: str) -> bool:
+    """校验CAS号的校验位"""
+    digits = cas.replace("-", "")
+    if not digits.isdigit() or len(digits) < 5:
+        return False
+    body, check = digits[:-1], int(digits[-1])
+    total = sum(int(d) * i for i, d in enumerate(reversed(body), 1))
+    return total % 10 == check
+
+
+def find_cas(text: str) -> Optional[str]:
+    """返回文本中第一个校验通过的CAS号"""
+    for match in CAS_RE.finditer(text):
+        cas = "-".join(match.groups())
+        if is_valid_cas(cas):
+            return cas
+    return None
+
+
+class ChemicalIdentifier:
+    """从OCR文本中识别化学品身份，作为查询缓存的键
+
+    优先使用CAS号，其次匹配常用化学品清单中的名称；清单中登记了CAS号的名称
+    与含该CAS号的标签会得到同一个键。
+    """
+
+    def __init__(self, entries: Optional[List[Tuple[List[str], Optional[str]]]] = None):
+        # entries: [(名称及别名, CAS号或None)]
+        self.entries = entries or []
+        self._by_name = {}
+        patterns = []
+        for aliases, cas in self.entries:
+            for alias in aliases:
+                self._by_name[alias.casefold()] = (aliases[0], cas)
+                pattern = re.escape(alias)
+                if alias.isascii():
+                    # 英文名需完整匹配，避免 Ethanol 命中 Methanol
+                    pattern = rf"(?<![A-Za-z]){pattern}(?![A-Za-z])"
+                else:
+                    # 中文名前后不能紧接其他汉字，避免 乙醇 命中 乙醇胺、盐酸 命中 盐酸羟胺
+                    pattern = rf"(?<![{_CJK}]){pattern}(?![{_CJK}])"
+                patterns.append((len(alias), pattern))
+        patterns.sort(reverse=True)
+        self._name_re = re.compile("|".join(p for _, p in patterns), re.IGNORECASE) if patterns else None
+
+    @classmethod
+    def from_file(cls, path: Optional[str]) -> "ChemicalIdentifier":
+        """读取常用化学品清单
+
+        每行一种化学品，逗号分隔名称和别名，可在末尾附CAS号，#开头为注释，例如：
+        乙醇,无水乙醇,Ethanol,64-17-5
+        """
+        if not path:
+            return cls()
+        entries = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    parts = [p.strip() for p in line.split(",") if p.strip()]
+                    cas = parts[-1] if len(parts) > 1 and is_valid_cas(parts[-1]) else None
+                    aliases = parts[:-1] if cas else parts
+                    if aliases:
+                        entries.append((aliases, cas))
+        except OSError as e:
+            logger.warning(f"读取常用化学品清单失败: {str(e)}")
+        return cls(entries)
+
+    def identify(self, text: str) -> Optional[str]:
+        """返回化学品身份键（cas:CAS号 或 name:名称），无法识别时返回None"""
+        cas = find_cas(text)
+        if cas:
+            return f"cas:{cas}"
+        if self._name_re is None:
+            return None
+        match = self._name_re.search(text)
+        if match is None:
+            return None
+        name, cas = self._by_name[match.group(0).casefold()]
+        return f"cas:{cas}" if cas else f"name:{name}"
+
+    def queries(self) -> List[str]:
+        """清单中每种化学品用于预热的查询文本"""
+        return [" ".join([aliases[0]] + ([cas] if cas else [])) for aliases, cas in self.entries]
@@ -2,10 +2,16 @@ import requests
 import logging
 import json
 import time
-from typing import Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Generator, Optional, Tuple
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from config.settings import LM_CONFIG  # 导入API配置
+from config.settings import LM_CONFIG, CACHE_CONFIG  # 导入API配置
+from .chemical_identity import ChemicalIdentifier
+from .json_stream import IncrementalJSONParser
+from .prompt_builder import PromptTemplate, expand_compact, expand_compact_field, get_chemical_template
+from .profiling import span
 
 logger = logging.getLogger(__name__)
 
@@ -30,58 +36,119 @@ class ChemicalInfoRetriever:
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
 
+        # 查询结果缓存（LRU + 过期时间），预热任务在后台线程写入
+        self.identifier = ChemicalIdentifier.from_file(CACHE_CONFIG["curated_list"])
+        self._cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def cache_key(self, chemical_name: str) -> str:
+        """缓存键：优先使用从文本中识别出的化学品身份（CAS号或常用名称），
+        无法识别时退化为归一化后的整段文本"""
+        identity = self.identifier.identify(chemical_name)
+        if identity:
+            return identity
+        return "text:" + " ".join(chemical_name.split())
+
+    def get_cached(self, chemical_name: str) -> Optional[Dict]:
+        """读取缓存，未命中或已过期返回None"""
+        key = self.cache_key(chemical_name)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.time() - entry[0] < CACHE_CONFIG["ttl"]:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._cache[key]
+            self.cache_misses += 1
+            return None
+
+    def is_cached(self, chemical_name: str) -> bool:
+        """检查缓存中是否有有效条目（不计入命中统计）"""
+        with self._cache_lock:
+            entry = self._cache.get(self.cache_key(chemical_name))
+            return entry is not None and time.time() - entry[0] < CACHE_CONFIG["ttl"]
+
+    def put_cached(self, chemical_name: str, info: Dict):
+        key = self.cache_key(chemical_name)
+        with self._cache_lock:
+            self._cache[key] = (time.time(), dict(info))
+            self._cache.move_to_end(key)
+            while len(self._cache) > CACHE_CONFIG["max_size"]:
+                self._cache.popitem(last=False)
+
+    def cache_stats(self) -> Dict:
+        with self._cache_lock:
+            total = self.cache_hits + self.cache_misses
+            return {
+                "size": len(self._cache),
+                "max_size": CACHE_CONFIG["max_size"],
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": self.cache_hits / total if total else 0.0
+            }
+
+    def _build_payload(self, template: PromptTemplate, chemical_name: str, stream: bool) -> Dict:
+        """构造化学品信息查询请求体"""
+        return {
+            "messages": template.messages(chemical_name),
+            "model": LM_CONFIG["model"],
+            "temperature": LM_CONFIG["temperature"],
+            "max_tokens": template.max_tokens,
+            "stream": stream
+        }
+
     def get_chemical_info(self, chemical_name: str) -> Optional[Dict]:
-        """获取化学品的详细信息"""
+        """获取化学品的详细信息，优先读取缓存"""
+        cached = self.get_cached(chemical_name)
+        if cached is not None:
+            return cached
+        return self._fetch_and_cache(chemical_name)
+
+    def warm(self, chemical_name: str) -> bool:
+        """预热缓存：未缓存时请求模型并写入，不计入命中统计"""
+        if self.is_cached(chemical_name):
+            return False
+        return self._fetch_and_cache(chemical_name) is not None
+
+    def _fetch_and_cache(self, chemical_name: str) -> Optional[Dict]:
+        if LM_CONFIG["stream"]:
+            state = {}
+            try:
+                info = dict(self._stream_fetch(chemical_name, state)) or None
+            except Exception as e:
+                logger.error(f"未知错误: {str(e)}")
+                logger.error(f"错误详情: {str(e.__class__.__name__)}: {str(e)}")
+                return None
+            complete = state.get("complete", False)
+        else:
+            info, complete = self._fetch_chemical_info(chemical_name)
+
+        # 截断后修复的结果可能缺少字段，不写入缓存
+        if info and complete:
+            self.put_cached(chemical_name, info)
+        return info
+
+    def _fetch_chemical_info(self, chemical_name: str) -> Tuple[Optional[Dict], bool]:
+        """请求模型获取化学品信息（非流式），返回(结果, 输出是否完整)"""
         try:
-            prompt = f"""请提供以下化学品的详细安全信息。直接返回JSON格式数据，不要包含其他内容：
-{{
-    "chemical_name": {{
-        "zh": "中文名",
-        "en": "英文名"
-    }},
-    "formula": "分子式",
-    "cas": "CAS号",
-    "hazard_class": "危险性类别",
-    "main_hazards": [
-        "主要危害1",
-        "主要危害2"
-    ],
-    "safety_measures": [
-        "防护措施1",
-        "防护措施2"
-    ],
-    "first_aid": [
-        "急救措施1",
-        "急救措施2"
-    ],
-    "storage": [
-        "储存注意事项1",
-        "储存注意事项2"
-    ]
-}}
-
-化学品：{chemical_name}"""
-
-            payload = {
-                "messages": [
-                    {"role": "system", "content": "你是一个化学品安全专家。请直接返回JSON格式的数据，不要包含任何其他内容。确保JSON格式正确。"},
-                    {"role": "user", "content": prompt}
-                ],
-                "model": LM_CONFIG["model"],
-                "temperature": LM_CONFIG["temperature"],
-                "max_tokens": LM_CONFIG["max_tokens"],
-                "stream": LM_CONFIG["stream"]
-            }
+            template = get_chemical_template()
+            payload = self._build_payload(template, chemical_name, stream=False)
 
             logger.info(f"发送请求到 {self.api_url}")
             
             # 使用配置的超时时间
-            response = self.session.post(
-                f"{self.api_url}{LM_CONFIG['api_endpoint']}",
-                headers=self.headers,
-                json=payload,
-                timeout=(10, LM_CONFIG["timeout"])  # (连接超时, 读取超时)
-            )
+            with span("llm_request") as attrs:
+                response = self.session.post(
+                    f"{self.api_url}{LM_CONFIG['api_endpoint']}",
+                    headers=self.headers,
+                    json=payload,
+                    timeout=(10, LM_CONFIG["timeout"])  # (连接超时, 读取超时)
+                )
+                retries = getattr(response.raw, "retries", None)
+                attrs["retries"] = len(retries.history) if retries else 0
             
             logger.info(f"API响应状态码: {response.status_code}")
             
@@ -89,78 +156,107 @@ class ChemicalInfoRetriever:
                 try:
                     result = response.json()
                     content = result['choices'][0]['message']['content']
-                    
-                    # 尝试从内容中提取JSON
-                    try:
-                        # 查找第一个有效的JSON对象
-                        content = content.strip()
-                        logger.debug(f"原始响应内容:\n{content}")
-                        
-                        # 如果内容以```json开头，去掉这个标记
-                        if '```json' in content:
-                            content = content[content.find('```json') + 7:]
-                            if '```' in content:
-                                content = content[:content.find('```')]
-                        
-                        content = content.strip()
-                        logger.debug(f"清理后的内容:\n{content}")
-                        
-                        # 尝试修复不完整的JSON
-                        if content.startswith('{') and not content.endswith('}'):
-                            content = content + '}'
-                        
-                        try:
-                            # 直接尝试解析整个内容
-                            chemical_info = json.loads(content)
-                            return chemical_info
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"直接解析失败: {str(e)}")
-                            # 尝试提取和修复第一个完整的JSON对象
-                            start = content.find('{')
-                            if start >= 0:
-                                # 计算嵌套层级来找到正确的结束位置
-                                level = 0
-                                end = -1
-                                for i in range(start, len(content)):
-                                    if content[i] == '{':
-                                        level += 1
-                                    elif content[i] == '}':
-                                        level -= 1
-                                        if level == 0:
-                                            end = i + 1
-                                            break
-                                
-                                if end > start:
-                                    json_str = content[start:end]
-                                    try:
-                                        chemical_info = json.loads(json_str)
-                                        return chemical_info
-                                    except json.JSONDecodeError:
-                                        logger.error(f"解析提取的JSON失败: {json_str}")
-                                        return None
-                            
-                            logger.error("未找到有效的JSON内容")
-                            return None
-                    except json.JSONDecodeError as e:
-                        logger.error(f"JSON解析失败: {str(e)}")
-                        logger.error(f"尝试解析的内容: {json_str}")
-                        return None
+                    logger.debug(f"原始响应内容:\n{content}")
+
+                    # 提取第一个JSON对象，截断时自动修复
+                    with span("json_parse"):
+                        parser = IncrementalJSONParser()
+                        parser.feed(content)
+                        chemical_info = parser.close()
+                        if template.compact:
+                            chemical_info = expand_compact(chemical_info)
+                    if chemical_info is None:
+                        logger.error("未找到有效的JSON内容")
+                    return chemical_info, parser.complete
                 except KeyError as e:
                     logger.error(f"响应格式错误: {str(e)}")
                     logger.error(f"响应内容: {result}")
-                    return None
+                    return None, False
             else:
                 logger.error(f"API请求失败: {response.status_code}")
                 logger.error(f"错误响应: {response.text}")
-                return None
+                return None, False
 
         except requests.exceptions.RequestException as e:
             logger.error(f"请求异常: {str(e)}")
-            return None
+            return None, False
         except Exception as e:
             logger.error(f"未知错误: {str(e)}")
             logger.error(f"错误详情: {str(e.__class__.__name__)}: {str(e)}")
-            return None
+            return None, False
+
+    def stream_chemical_info(self, chemical_name: str) -> Generator[Tuple[str, Any], None, None]:
+        """流式获取化学品信息，每个顶层字段完整后立即产出(字段名, 值)"""
+        cached = self.get_cached(chemical_name)
+        if cached is not None:
+            yield from cached.items()
+            return
+
+        info = {}
+        state = {}
+        for key, value in self._stream_fetch(chemical_name, state):
+            info[key] = value
+            yield key, value
+        if info and state.get("complete"):
+            self.put_cached(chemical_name, info)
+
+    def _stream_fetch(self, chemical_name: str, state: Dict) -> Generator[Tuple[str, Any], None, None]:
+        """请求模型流式输出并增量解析，结束时state["complete"]表示输出是否完整"""
+        parser = IncrementalJSONParser()
+        template = get_chemical_template()
+        # 紧凑模式下将短键映射回完整字段名
+        expand = expand_compact_field if template.compact else (lambda k, v: (k, v))
+        try:
+            payload = self._build_payload(template, chemical_name, stream=True)
+
+            logger.info(f"发送流式请求到 {self.api_url}")
+
+            with span("llm_request", stream=True) as attrs, self.session.post(
+                f"{self.api_url}{LM_CONFIG['api_endpoint']}",
+                headers=self.headers,
+                json=payload,
+                stream=True,
+                timeout=(10, LM_CONFIG["timeout"])
+            ) as response:
+                retries = getattr(response.raw, "retries", None)
+                attrs["retries"] = len(retries.history) if retries else 0
+                if response.status_code != 200:
+                    logger.error(f"API请求失败: {response.status_code}")
+                    logger.error(f"错误响应: {response.text}")
+                    return
+
+                # 按字节读取后显式以UTF-8解码：text/event-stream未声明charset时
+                # requests会按ISO-8859-1解码，导致中文乱码
+                for raw_line in response.iter_lines():
+                    line = raw_line.decode("utf-8")
+                    # SSE格式: "data: {...}"，以 "data: [DONE]" 结束
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                        delta = chunk['choices'][0]['delta'].get('content') or ''
+                    except (json.JSONDecodeError, KeyError, IndexError):
+                        logger.warning(f"无法解析的流式数据: {data}")
+                        continue
+
+                    for key, value in parser.feed(delta):
+                        yield expand(key, value)
+                    if parser.done:
+                        # 对象已完整，不再等待剩余输出
+                        break
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"流式请求异常: {str(e)}")
+        except Exception as e:
+            logger.error(f"流式响应处理失败: {str(e.__class__.__name__)}: {str(e)}")
+
+        # 完整解析的字段均已产出，截断或格式错误的字段直接丢弃
+        state["complete"] = parser.complete
+        if not parser.complete:
+            logger.warning("流式输出不完整，已丢弃未完成或格式错误的字段")
 
     def format_info(self, info: Dict) -> str:
         """格式化化学品信息为易读的文本格式"""
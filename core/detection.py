@@ -1,11 +1,20 @@
 from ultralytics import YOLO
+import numpy as np
 import logging
+from typing import Dict, List
 
 logger = logging.getLogger(__name__)
 
+# 标签区域占瓶体高度的比例（假设标签位于瓶体上部30%）
+LABEL_HEIGHT_RATIO = 0.3
+
 class YOLODetector:
     def __init__(self, config):
         self.config = config
+        self.imgsz = config.get("imgsz", 640)
+        self.batch_size = config.get("batch_size", 8)
+        if self.batch_size < 1:
+            raise ValueError(f"batch_size必须大于等于1: {self.batch_size}")
         self.model = self._load_model()
         
     def _load_model(self):
@@ -16,29 +25,52 @@ class YOLODetector:
         except Exception as e:
             logger.error(f"模型加载失败: {str(e)}")
             raise
+
+    def _predict(self, source, imgsz=None):
+        return self.model(
+            source,
+            imgsz=imgsz or self.imgsz,
+            conf=self.config["confidence_threshold"],
+            verbose=False
+        )
+
+    def _parse_result(self, result) -> List[Dict]:
+        """对单张图片的检测结果做向量化的置信度过滤和标签区域计算"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+
+        data = boxes.data.cpu().numpy()
+        conf = boxes.conf.cpu().numpy()
+        cls = boxes.cls.cpu().numpy().astype(int)
+
+        keep = conf > self.config["confidence_threshold"]
+        data, conf, cls = data[keep], conf[keep], cls[keep]
+
+        labels = data[:, :4].copy()
+        y1, y2 = labels[:, 1], labels[:, 3]
+        labels[:, 3] = np.minimum(y1 + (y2 - y1) * LABEL_HEIGHT_RATIO, y2)
+
+        return [
+            {
+                "bottle": bottle,
+                "label": label,
+                "confidence": c,
+                "class_id": k
+            }
+            for bottle, label, c, k in zip(data.tolist(), labels.tolist(), conf.tolist(), cls.tolist())
+        ]
         
     def detect(self, image_path):
-        print(f"Loading image from: {image_path}")
-        results = self.model(image_path)[0]
-        print(f"Detection completed, found {len(results.boxes)} potential objects")
-        detections = []
-        for box in results.boxes:
-            conf = box.conf.item()
-            print(f"Object detected with confidence: {conf:.2f}")
-            if conf > self.config["confidence_threshold"]:
-                bbox = box.data.tolist()[0]
-                # Assume label is in top 30% of bottle
-                x1, y1, x2, y2 = bbox[:4]
-                label_bbox = [
-                    x1,
-                    y1,
-                    x2,
-                    min(y1 + (y2-y1)*0.3, y2)  # Label region height
-                ]
-                detections.append({
-                    "bottle": bbox,
-                    "label": label_bbox,
-                    "confidence": box.conf.item(),
-                    "class_id": int(box.cls.item())
-                })
+        logger.debug(f"Loading image from: {image_path}")
+        detections = self._parse_result(self._predict(image_path)[0])
+        logger.debug(f"Detection completed, kept {len(detections)} objects")
         return detections
+
+    def detect_batch(self, frames, imgsz=None) -> List[List[Dict]]:
+        """批量检测内存中的图像帧（BGR ndarray），按输入顺序返回每帧的检测结果"""
+        results = []
+        for start in range(0, len(frames), self.batch_size):
+            batch = list(frames[start:start + self.batch_size])
+            results.extend(self._parse_result(r) for r in self._predict(batch, imgsz))
+        return results
@@ -1,13 +1,21 @@
+from .prompt_builder import PromptTemplate
+
 class InstructionManager:
     def __init__(self, templates):
-        self.templates = templates
+        # 预编译模板，避免每次请求重复解析
+        self.templates = {
+            name: PromptTemplate(name, template) for name, template in templates.items()
+        }
     
-    def get_instruction(self, class_name, text):
-        template = self.templates.get(
+    def get_template(self, class_name):
+        return self.templates.get(
             class_name,
             self.templates["default"]
         )
-        return template.format(text)
+
+    def get_instruction(self, class_name, text):
+        # OCR文本会被清理并截断至token预算内
+        return self.get_template(class_name).render(text)
     
     def add_template(self, class_name, template):
-        self.templates[class_name] = template
\ No newline at end of file
+        self.templates[class_name] = PromptTemplate(class_name, template)
@@ -0,0 +1,156 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONParser:
+    """增量式JSON解析器
+
+    逐段接收LLM流式输出的文本，跳过```json围栏等前后缀，
+    顶层对象的每个字段一旦完整即可取出。输出在max_tokens处被截断或某个字段
+    格式有误时，close()只保留完整解析的顶层字段，写了一半的字段（包括其中
+    嵌套的列表和对象）整体丢弃，不会出现截断的CAS号或缺项的列表。
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0              # 已扫描到的位置
+        self._start = -1           # 顶层'{'位置
+        self._stack: List[str] = []
+        self._expect_key: List[bool] = []  # 每层对象当前是否在等待键
+        self._in_string = False
+        self._escape = False
+        self._member_start = -1    # 当前顶层成员起始位置
+        self._member_emitted = False
+        self._skipped = False      # 是否有顶层字段因格式错误被丢弃
+        self._fields: Dict[str, Any] = {}
+        self._done = False
+
+    @property
+    def done(self) -> bool:
+        """顶层对象是否已闭合"""
+        return self._done
+
+    @property
+    def complete(self) -> bool:
+        """顶层对象已闭合且所有字段都解析成功"""
+        return self._done and not self._skipped
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        """目前已完整解析的顶层字段"""
+        return dict(self._fields)
+
+    def feed(self, delta: str) -> List[Tuple[str, Any]]:
+        """追加一段文本，返回本次新完成的顶层字段"""
+        if self._done or not delta:
+            return []
+        self._buf += delta
+        completed: List[Tuple[str, Any]] = []
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+
+        while i < n and not self._done:
+            ch = buf[i]
+
+            if self._start < 0:
+                if ch == "{":
+                    self._start = i
+                    self._open("{")
+                    self._member_start = i + 1
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and not self._expect_key[-1]:
+                        self._emit_member(i + 1, completed)
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._open(ch)
+            elif ch in "}]":
+                self._stack.pop()
+                self._expect_key.pop()
+                if not self._stack:
+                    self._emit_member(i, completed)
+                    self._done = True
+                elif len(self._stack) == 1:
+                    self._emit_member(i + 1, completed)
+            elif ch == ":":
+                self._expect_key[-1] = False
+            elif ch == ",":
+                if self._stack[-1] == "{":
+                    self._expect_key[-1] = True
+                if len(self._stack) == 1:
+                    self._emit_member(i, completed)
+                    self._member_start = i + 1
+                    self._member_emitted = False
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def close(self) -> Optional[Dict]:
+        """输入结束，返回解析出的对象，未找到任何字段时返回None
+
+        结果可能缺少字段，可通过complete判断是否完整。
+        """
+        if self._start < 0:
+            return None
+        if self.complete:
+            result = self._loads(self._buf[self._start:self._pos])
+            if isinstance(result, dict):
+                return result
+        if not self._done:
+            logger.warning("JSON输出不完整，仅保留已完整解析的字段")
+        elif self._skipped:
+            logger.warning("JSON中有字段格式错误，已丢弃")
+        return dict(self._fields) or None
+
+    def _open(self, ch: str):
+        self._stack.append(ch)
+        self._expect_key.append(ch == "{")
+
+    def _emit_member(self, end: int, completed: List[Tuple[str, Any]]):
+        """解析[成员起点, end)之间的顶层键值对"""
+        if self._member_emitted:
+            return
+        segment = self._buf[self._member_start:end].strip()
+        if not segment:
+            return
+        self._member_emitted = True
+        member = self._loads("{" + segment + "}")
+        if not isinstance(member, dict):
+            self._skipped = True
+            logger.debug(f"无法解析的字段: {segment}")
+            return
+        for key, value in member.items():
+            self._fields[key] = value
+            completed.append((key, value))
+
+    @staticmethod
+    def _loads(text: str) -> Any:
+        try:
+            # strict=False 允许字符串中出现LLM常输出的原始换行符
+            return json.loads(text, strict=False)
+        except json.JSONDecodeError:
+            return None
+
+
+def parse_json_response(content: str) -> Optional[Dict]:
+    """从完整的LLM回复中提取第一个JSON对象，必要时修复截断"""
+    parser = IncrementalJSONParser()
+    parser.feed(content)
+    return parser.close()
@@ -14,14 +14,14 @@ class LMClient:
             "content": instruction
         }]
     
-    def query(self, prompt):
+    def query(self, prompt, max_tokens=None):
         try:
             response = requests.post(
                 self.config["api_url"],
                 json={
                     "messages": prompt,
                     "temperature": self.config["temperature"],
-                    "max_tokens": self.config["max_tokens"]
+                    "max_tokens": max_tokens or self.config["max_tokens"]
                 },
                 timeout=30
             )
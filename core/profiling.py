@@ -0,0 +1,198 @@
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Dict, Iterator, List, Optional
+
+from config.settings import PROFILING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+# 同一时刻只能有一个cProfile处于激活状态
+_cprofile_lock = threading.Lock()
+
+
+class RequestProfile:
+    """单次请求的阶段耗时记录及可选的cProfile结果"""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.spans: List[Dict] = []
+        self.cprofile_stats: Optional[str] = None
+        self._depth = 0
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "span_count": len(self.spans),
+            "has_cprofile": self.cprofile_stats is not None
+        }
+
+    def to_dict(self) -> Dict:
+        data = self.summary()
+        data["spans"] = list(self.spans)
+        data["cprofile"] = self.cprofile_stats
+        return data
+
+
+class ProfileStore:
+    """固定容量的环形缓冲区，保存最近的请求剖析结果"""
+
+    def __init__(self, maxlen: int):
+        self._profiles = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [p.summary() for p in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        with self._lock:
+            for p in self._profiles:
+                if p.id == profile_id:
+                    return p.to_dict()
+        return None
+
+
+profile_store = ProfileStore(PROFILING_CONFIG["buffer_size"])
+
+
+def should_profile(flag: Optional[str] = None) -> bool:
+    """根据显式开关或采样率决定是否剖析本次请求"""
+    if not PROFILING_CONFIG["enabled"]:
+        return False
+    if flag is not None and flag.lower() in ("1", "true", "cpu", "trace"):
+        return True
+    return random.random() < PROFILING_CONFIG["sample_rate"]
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current_profile.get()
+
+
+def begin_profile(name: str, use_cprofile: bool = False) -> RequestProfile:
+    """创建一次请求剖析并按需启动cProfile，需配合end_profile使用"""
+    profile = RequestProfile(name)
+    if use_cprofile and _cprofile_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            profile._profiler = profiler
+        except ValueError:
+            # 其他工具已占用了性能剖析钩子
+            _cprofile_lock.release()
+    return profile
+
+
+def end_profile(profile: RequestProfile):
+    """结束剖析并写入环形缓冲区，重复调用无副作用"""
+    if profile.duration_ms is not None:
+        return
+    profiler = profile._profiler
+    if profiler is not None:
+        profiler.disable()
+        profile._profiler = None
+        _cprofile_lock.release()
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(PROFILING_CONFIG["cprofile_top_n"])
+        profile.cprofile_stats = out.getvalue()
+    profile.duration_ms = (time.perf_counter() - profile._t0) * 1000
+    profile_store.add(profile)
+    logger.info(f"请求剖析完成 [{profile.id}] {profile.name}: {profile.duration_ms:.1f}ms")
+
+
+def activate(profile: Optional[RequestProfile]):
+    """将剖析设为当前上下文的活动剖析，返回用于恢复的token"""
+    return _current_profile.set(profile)
+
+
+def deactivate(token):
+    _current_profile.reset(token)
+
+
+def bind_profile(iterator: Iterator, profile: Optional[RequestProfile]) -> Iterator:
+    """让迭代器在指定剖析的上下文中运行
+
+    StreamingResponse会在线程池中逐项迭代同步生成器，不保证带上请求的上下文变量。
+    """
+    if profile is None:
+        return iterator
+
+    ctx = copy_context()
+    ctx.run(_current_profile.set, profile)
+
+    def run():
+        try:
+            while True:
+                try:
+                    item = ctx.run(next, iterator)
+                except StopIteration:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                ctx.run(close)
+
+    return run()
+
+
+@contextmanager
+def profile_request(name: str, use_cprofile: bool = False):
+    """激活一次请求剖析，结束后写入环形缓冲区"""
+    profile = begin_profile(name, use_cprofile)
+    token = activate(profile)
+    try:
+        yield profile
+    finally:
+        deactivate(token)
+        end_profile(profile)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """记录一个处理阶段的耗时，未激活剖析时几乎无开销
+
+    yield出的字典可在阶段内补充附加信息（如重试次数），未激活时同样可写入。
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield attrs
+        return
+    start = time.perf_counter()
+    profile._depth += 1
+    try:
+        yield attrs
+    finally:
+        profile._depth -= 1
+        record = {
+            "name": name,
+            "depth": profile._depth,
+            "start_ms": (start - profile._t0) * 1000,
+            "duration_ms": (time.perf_counter() - start) * 1000
+        }
+        if attrs:
+            record["attrs"] = attrs
+        profile.spans.append(record)
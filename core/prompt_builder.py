@@ -0,0 +1,171 @@
+import re
+import string
+from typing import Any, Dict, List, Optional
+
+from config.settings import LM_CONFIG, PROMPT_CONFIG
+
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+_SYMBOL_RUN_RE = re.compile(r"([^\w\s])\1{2,}")
+
+# 紧凑模式下的短键与完整chemical_info字段的对应关系
+COMPACT_KEYS = {
+    "n": "chemical_name",
+    "f": "formula",
+    "cas": "cas",
+    "hc": "hazard_class",
+    "hz": "main_hazards",
+    "sm": "safety_measures",
+    "fa": "first_aid",
+    "st": "storage"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：中文等宽字符（UTF-8下3字节）约1个token，其余约4个字符1个token"""
+    wide = (len(text.encode("utf-8")) - len(text)) // 2
+    other = len(text) - wide
+    return wide + (other + 3) // 4
+
+
+def normalize_ocr_text(text: str) -> str:
+    """清理OCR文本：去除控制字符，合并空白和重复符号"""
+    text = _CONTROL_RE.sub(" ", text)
+    text = _SYMBOL_RUN_RE.sub(r"\1", text)
+    return " ".join(text.split())
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """按估算token数截断文本（保留开头，化学品名称通常位于标签上部）"""
+    if budget <= 0 or len(text) <= budget or estimate_tokens(text) <= budget:
+        return text
+    # 二分查找不超过预算的最长前缀
+    lo, hi = budget, min(len(text), budget * 4)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def expand_compact_field(key: str, value: Any):
+    """将紧凑模式的单个字段映射回完整结构的(字段名, 值)"""
+    full_key = COMPACT_KEYS.get(key, key)
+    if full_key == "chemical_name" and isinstance(value, list):
+        value = {"zh": value[0] if value else "", "en": value[1] if len(value) > 1 else ""}
+    return full_key, value
+
+
+def expand_compact(info: Optional[Dict]) -> Optional[Dict]:
+    """将紧凑模式的结果映射回完整的chemical_info结构"""
+    if info is None:
+        return None
+    return dict(expand_compact_field(k, v) for k, v in info.items())
+
+
+def _split_template(template: str) -> List[str]:
+    """将模板按占位符（{} 或 {0}）切分为文本片段，{{ }} 按转义处理
+
+    模板没有占位符或格式无法解析时，将文本附加在模板末尾。
+    """
+    pieces, current = [], []
+    try:
+        for literal, field, spec, conversion in string.Formatter().parse(template):
+            current.append(literal)
+            if field is None:
+                continue
+            if field in ("", "0"):
+                pieces.append("".join(current))
+                current = []
+            else:
+                # 其他具名占位符原样保留
+                current.append("{" + field + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}")
+    except ValueError:
+        return [template + "\n", ""]
+    pieces.append("".join(current))
+    if len(pieces) == 1:
+        return [pieces[0] + "\n" if pieces[0] else "", ""]
+    return pieces
+
+
+class PromptTemplate:
+    """预编译的提示模板：初始化时按占位符切分，渲染时只需拼接"""
+
+    def __init__(self, name: str, user: str, system: Optional[str] = None,
+                 max_tokens: Optional[int] = None, input_budget: Optional[int] = None,
+                 compact: bool = False):
+        self.name = name
+        self.pieces = _split_template(user)
+        self.system = system
+        self.max_tokens = max_tokens or LM_CONFIG["max_tokens"]
+        self.input_budget = input_budget if input_budget is not None else PROMPT_CONFIG["input_token_budget"]
+        self.compact = compact
+
+    def render(self, text: str) -> str:
+        text = truncate_to_budget(normalize_ocr_text(text), self.input_budget)
+        return text.join(self.pieces)
+
+    def messages(self, text: str) -> List[Dict]:
+        messages = []
+        if self.system:
+            messages.append({"role": "system", "content": self.system})
+        messages.append({"role": "user", "content": self.render(text)})
+        return messages
+
+
+CHEMICAL_FULL_PROMPT = """请提供以下化学品的详细安全信息。直接返回JSON格式数据，不要包含其他内容：
+{{
+    "chemical_name": {{
+        "zh": "中文名",
+        "en": "英文名"
+    }},
+    "formula": "分子式",
+    "cas": "CAS号",
+    "hazard_class": "危险性类别",
+    "main_hazards": [
+        "主要危害1",
+        "主要危害2"
+    ],
+    "safety_measures": [
+        "防护措施1",
+        "防护措施2"
+    ],
+    "first_aid": [
+        "急救措施1",
+        "急救措施2"
+    ],
+    "storage": [
+        "储存注意事项1",
+        "储存注意事项2"
+    ]
+}}
+
+化学品：{}"""
+
+CHEMICAL_COMPACT_PROMPT = (
+    '只输出一行JSON：{{"n":["中文名","英文名"],"f":"分子式","cas":"CAS号","hc":"危险性类别",'
+    '"hz":["主要危害"],"sm":["防护措施"],"fa":["急救措施"],"st":["储存要求"]}}，每个列表至多3条，每条不超过20字。'
+    '标签文字：{}'
+)
+
+CHEMICAL_TEMPLATES = {
+    "full": PromptTemplate(
+        "full",
+        CHEMICAL_FULL_PROMPT,
+        system="你是一个化学品安全专家。请直接返回JSON格式的数据，不要包含任何其他内容。确保JSON格式正确。",
+        max_tokens=PROMPT_CONFIG["max_tokens"]["full"]
+    ),
+    "compact": PromptTemplate(
+        "compact",
+        CHEMICAL_COMPACT_PROMPT,
+        system="你是化学品安全专家，只输出JSON。",
+        max_tokens=PROMPT_CONFIG["max_tokens"]["compact"],
+        compact=True
+    )
+}
+
+
+def get_chemical_template(mode: Optional[str] = None) -> PromptTemplate:
+    """按模式获取化学品信息查询模板，默认使用PROMPT_CONFIG中的配置"""
+    return CHEMICAL_TEMPLATES.get(mode or PROMPT_CONFIG["mode"], CHEMICAL_TEMPLATES["full"])
@@ -1,7 +1,8 @@
 import cv2
 from PIL import Image
-from typing import List, Dict
+from typing import List, Dict, Optional
 from core import YOLODetector, OCRProcessor, InstructionManager, LMClient
+from core.profiling import current_profile, profile_request, should_profile, span
 
 class TextProcessingPipeline:
     def __init__(self, yolo_config, ocr_config, lm_config, instructions):
@@ -28,15 +29,26 @@ class TextProcessingPipeline:
             
         return bottle_crops, label_crops
 
-    def process(self, image_path) -> List[Dict]:
+    def process(self, image_path, profile: Optional[str] = None) -> List[Dict]:
+        """处理单张图片；profile取值同X-Profile请求头（1/trace/cpu），也受采样率控制"""
+        if current_profile() is None and should_profile(profile):
+            with profile_request(f"pipeline {image_path}",
+                                 use_cprofile=(profile or "").lower() == "cpu"):
+                return self._process(image_path)
+        return self._process(image_path)
+
+    def _process(self, image_path) -> List[Dict]:
         # 目标检测
-        detections = self.detector.detect(image_path)
+        with span("detect"):
+            detections = self.detector.detect(image_path)
         
         # 裁剪区域
-        bottle_images, label_images = self._crop_image(image_path, detections)
+        with span("crop"):
+            bottle_images, label_images = self._crop_image(image_path, detections)
         
         # OCR处理 (only on label regions)
-        ocr_results = [self.ocr.process_image(img) for img in label_images]
+        with span("ocr", regions=len(label_images)):
+            ocr_results = [self.ocr.process_image(img) for img in label_images]
         
         # 构造结果
         output = []
@@ -44,14 +56,15 @@ class TextProcessingPipeline:
             class_name = self.class_names[det['class_id']]
             
             # 生成化学专用指令
-            instruction = self.instruction_mgr.get_instruction(
-                "chemical" if "chemical" in class_name.lower() else class_name,
-                text
+            template = self.instruction_mgr.get_template(
+                "chemical" if "chemical" in class_name.lower() else class_name
             )
+            instruction = template.render(text)
             
             # 模型查询
             prompt = self.lm_client.generate_prompt(instruction)
-            analysis = self.lm_client.query(prompt)
+            with span("lm_query"):
+                analysis = self.lm_client.query(prompt, max_tokens=template.max_tokens)
             
             output.append({
                 "class": class_name,
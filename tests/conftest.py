@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+# 测试不需要YOLO/OCR模型文件，跳过config.settings中的模型路径检查
+os.environ.setdefault("CHEM_SKIP_MODEL_CHECK", "1")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,56 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from core.artifact_writer import ArtifactWriter
+
+
+def _writer(tmp_path, **overrides):
+    config = {"queue_size": 16, "batch_size": 4, "fsync": True, "archive_dir": None,
+              "archive_max_side": 100, "archive_quality": 80}
+    config.update(overrides)
+    return ArtifactWriter(config)
+
+
+def test_batch_written_atomically_without_temp_files(tmp_path):
+    writer = _writer(tmp_path)
+    batch = [(str(tmp_path / f"output_{i}.txt"), f"结果{i}".encode("utf-8"), None) for i in range(3)]
+    writer._write_batch(batch)
+
+    for path, data, _ in batch:
+        with open(path, "rb") as f:
+            assert f.read() == data
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["output_0.txt", "output_1.txt", "output_2.txt"]
+
+
+def test_full_queue_drops_file(tmp_path):
+    writer = _writer(tmp_path, queue_size=1)
+    assert writer.submit(str(tmp_path / "a.txt"), b"a")
+    assert not writer.submit(str(tmp_path / "b.txt"), b"b")
+    assert writer.dropped == 1
+
+
+def test_stop_drains_pending_items(tmp_path):
+    writer = _writer(tmp_path)
+    paths = [tmp_path / f"input_{i}.jpg" for i in range(10)]
+    for path in paths:
+        assert writer.submit(str(path), path.name.encode())
+    writer.start()
+    writer.stop(timeout=5)
+
+    assert all(path.read_bytes() == path.name.encode() for path in paths)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_archive_copy_is_downscaled(tmp_path):
+    archive_dir = tmp_path / "archive"
+    writer = _writer(tmp_path, archive_dir=str(archive_dir))
+    image = np.full((200, 400, 3), 128, dtype=np.uint8)
+    assert writer.submit(str(tmp_path / "input_1.png"), b"original", image)
+    writer.start()
+    writer.stop(timeout=5)
+
+    assert (tmp_path / "input_1.png").read_bytes() == b"original"
+    archived = cv2.imread(str(archive_dir / "input_1.jpg"))
+    assert archived.shape[:2] == (50, 100)
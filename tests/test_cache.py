@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+import core.chemical_info as chemical_info
+from core.cache_warmup import CacheWarmer
+from core.chemical_identity import ChemicalIdentifier
+from core.chemical_info import ChemicalInfoRetriever
+
+
+@pytest.fixture
+def retriever(monkeypatch):
+    monkeypatch.setitem(chemical_info.CACHE_CONFIG, "max_size", 2)
+    monkeypatch.setitem(chemical_info.CACHE_CONFIG, "ttl", 100)
+    return ChemicalInfoRetriever()
+
+
+def test_cache_evicts_least_recently_used(retriever):
+    retriever.put_cached("乙醇 64-17-5", {"cas": "64-17-5"})
+    retriever.put_cached("丙酮 67-64-1", {"cas": "67-64-1"})
+    # 读取乙醇后，丙酮成为最久未使用的条目
+    assert retriever.get_cached("无水乙醇 CAS 64-17-5") == {"cas": "64-17-5"}
+    retriever.put_cached("盐酸 7647-01-0", {"cas": "7647-01-0"})
+
+    assert retriever.is_cached("64-17-5")
+    assert not retriever.is_cached("67-64-1")
+    assert retriever.is_cached("7647-01-0")
+    assert retriever.cache_stats()["size"] == 2
+
+
+def test_cache_entries_expire(retriever, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(chemical_info.time, "time", lambda: now[0])
+    retriever.put_cached("乙醇 64-17-5", {"cas": "64-17-5"})
+
+    now[0] += 99
+    assert retriever.get_cached("64-17-5") == {"cas": "64-17-5"}
+    now[0] += 1
+    assert not retriever.is_cached("64-17-5")
+    assert retriever.get_cached("64-17-5") is None
+    stats = retriever.cache_stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (0, 1, 1)
+
+
+class FakeRetriever:
+    """只实现CacheWarmer用到的接口，记录预热请求"""
+
+    def __init__(self, identifier=None, cached=()):
+        self.identifier = identifier or ChemicalIdentifier()
+        self.cached = set(cached)
+        self.warmed = []
+        self.warm_called = threading.Event()
+
+    def cache_key(self, text):
+        return self.identifier.identify(text) or "text:" + " ".join(text.split())
+
+    def is_cached(self, text):
+        return self.cache_key(text) in self.cached
+
+    def warm(self, text):
+        self.warmed.append(text)
+        self.warm_called.set()
+        return True
+
+
+def _config(tmp_path, **overrides):
+    config = {"output_dir": str(tmp_path), "file_pattern": "output_*.txt", "top_n": 50,
+              "min_count": 2, "min_interval": 0, "interval": 0}
+    config.update(overrides)
+    return config
+
+
+def _write_history(tmp_path, texts):
+    for i, text in enumerate(texts):
+        (tmp_path / f"output_{i}.txt").write_text(text, encoding="utf-8")
+
+
+def test_candidates_respect_min_count_and_top_n(tmp_path):
+    _write_history(tmp_path, ["丙酮 67-64-1"] * 3 + ["盐酸 7647-01-0"] * 2 + ["甲苯 108-88-3"])
+    identifier = ChemicalIdentifier([(["乙醇"], "64-17-5"), (["丙酮"], "67-64-1")])
+    warmer = CacheWarmer(FakeRetriever(identifier), _config(tmp_path))
+
+    # 常用清单在前，历史中与清单重复的丙酮不重复出现，只出现一次的甲苯被过滤
+    assert warmer.collect_candidates() == ["乙醇 64-17-5", "丙酮 67-64-1", "盐酸 7647-01-0"]
+
+    warmer.config["top_n"] = 2
+    assert warmer.collect_candidates() == ["乙醇 64-17-5", "丙酮 67-64-1"]
+
+
+def test_run_once_skips_cached_entries(tmp_path):
+    _write_history(tmp_path, ["丙酮 67-64-1"] * 2 + ["盐酸 7647-01-0"] * 2)
+    retriever = FakeRetriever(cached={"cas:67-64-1"})
+    warmer = CacheWarmer(retriever, _config(tmp_path))
+
+    assert warmer.run_once() == 1
+    assert retriever.warmed == ["盐酸 7647-01-0"]
+
+
+def test_stop_interrupts_rate_limit_wait(tmp_path):
+    _write_history(tmp_path, ["丙酮 67-64-1"] * 2 + ["盐酸 7647-01-0"] * 2)
+    retriever = FakeRetriever()
+    warmer = CacheWarmer(retriever, _config(tmp_path, min_interval=60))
+    warmer.start()
+    assert retriever.warm_called.wait(5)
+    thread = warmer._thread
+    warmer.stop()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert len(retriever.warmed) == 1
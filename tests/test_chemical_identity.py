@@ -0,0 +1,45 @@
+from core.chemical_identity import ChemicalIdentifier, find_cas, is_valid_cas
+
+
+def test_cas_checksum():
+    assert is_valid_cas("64-17-5")
+    assert is_valid_cas("7647-01-0")
+    assert not is_valid_cas("64-17-6")
+
+
+def test_find_cas_tolerates_ocr_dashes_and_spaces():
+    assert find_cas("无水乙醇 CAS：64 — 17 — 5 AR") == "64-17-5"
+    assert find_cas("批号 2023-05-01 CAS 67-64-1") == "67-64-1"
+    assert find_cas("CAS 64-17-6") is None
+
+
+def test_identify_prefers_cas_then_curated_name(tmp_path):
+    path = tmp_path / "chemicals.txt"
+    path.write_text("# 常用试剂\n乙醇,无水乙醇,Ethanol,64-17-5\n丙酮\n", encoding="utf-8")
+    identifier = ChemicalIdentifier.from_file(str(path))
+
+    assert identifier.identify("盐酸 CAS 7647-01-0") == "cas:7647-01-0"
+    assert identifier.identify("无水乙醇 500ml 分析纯") == "cas:64-17-5"
+    assert identifier.identify("ETHANOL absolute") == "cas:64-17-5"
+    assert identifier.identify("Methanol 500ml") is None
+    assert identifier.identify("丙酮 Acetone") == "name:丙酮"
+    assert identifier.queries() == ["乙醇 64-17-5", "丙酮"]
+
+
+def test_missing_list_still_identifies_cas():
+    identifier = ChemicalIdentifier.from_file(None)
+    assert identifier.identify("乙醇 64-17-5") == "cas:64-17-5"
+    assert identifier.identify("乙醇") is None
+
+
+def test_curated_names_match_whole_tokens_only():
+    identifier = ChemicalIdentifier([
+        (["乙醇", "Ethanol"], "64-17-5"),
+        (["甲醇", "Methanol"], "67-56-1"),
+        (["盐酸", "Hydrochloric acid"], "7647-01-0"),
+    ])
+    assert identifier.identify("乙醇胺 Ethanolamine 500ml") is None
+    assert identifier.identify("甲醇钠 Sodium methoxide") is None
+    assert identifier.identify("盐酸羟胺 分析纯") is None
+    assert identifier.identify("甲醇 500ml") == "cas:67-56-1"
+    assert identifier.identify("品名：乙醇（分析纯）") == "cas:64-17-5"
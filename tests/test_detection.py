@@ -0,0 +1,99 @@
+import sys
+import types
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+try:
+    import ultralytics  # noqa: F401
+except ImportError:
+    # 测试不加载真实模型，未安装ultralytics时提供占位模块以便导入core.detection
+    sys.modules["ultralytics"] = types.SimpleNamespace(YOLO=None)
+
+import core.detection as detection
+from core.detection import YOLODetector
+
+
+class FakeTensor:
+    def __init__(self, array):
+        self._array = np.asarray(array, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._array
+
+
+class FakeBoxes:
+    def __init__(self, rows):
+        # 每行: x1, y1, x2, y2, conf, cls
+        data = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+        self.data = FakeTensor(data)
+        self.conf = FakeTensor(data[:, 4])
+        self.cls = FakeTensor(data[:, 5])
+
+    def __len__(self):
+        return len(self.data.numpy())
+
+
+class FakeModel:
+    """按帧返回预设的检测框，并记录每次推理的批大小"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.batches = []
+
+    def fuse(self):
+        pass
+
+    def __call__(self, source, imgsz, conf, verbose):
+        frames = source if isinstance(source, list) else [source]
+        self.batches.append(len(frames))
+        return [types.SimpleNamespace(boxes=FakeBoxes(self.rows)) for _ in frames]
+
+
+ROWS = [
+    [10, 100, 50, 200, 0.9, 0],
+    [0, 0, 20, 20, 0.2, 1],     # 低于置信度阈值
+    [5, 50, 15, 60, 0.3, 2],    # 等于阈值同样被过滤
+]
+
+
+@pytest.fixture
+def make_detector(monkeypatch):
+    def make(batch_size=8):
+        model = FakeModel(ROWS)
+        monkeypatch.setattr(detection, "YOLO", lambda path: model)
+        detector = YOLODetector({"model_path": "fake.pt", "confidence_threshold": 0.3,
+                                 "batch_size": batch_size})
+        return detector, model
+    return make
+
+
+def test_filters_by_confidence_and_computes_label_region(make_detector):
+    detector, _ = make_detector()
+    detections = detector.detect("image.jpg")
+
+    assert len(detections) == 1
+    det = detections[0]
+    assert det["bottle"][:4] == [10, 100, 50, 200]
+    assert det["label"] == pytest.approx([10, 100, 50, 130])
+    assert det["confidence"] == pytest.approx(0.9)
+    assert det["class_id"] == 0
+
+
+def test_detect_batch_chunks_by_batch_size(make_detector):
+    detector, model = make_detector(batch_size=2)
+    frames = [np.zeros((4, 4, 3), dtype=np.uint8) for _ in range(5)]
+    results = detector.detect_batch(frames)
+
+    assert model.batches == [2, 2, 1]
+    assert len(results) == 5
+    assert all(len(r) == 1 for r in results)
+
+
+def test_invalid_batch_size(make_detector):
+    with pytest.raises(ValueError):
+        make_detector(batch_size=0)
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from core.json_stream import IncrementalJSONParser, parse_json_response
+
+INFO = {
+    "chemical_name": {"zh": "乙醇", "en": "Ethanol"},
+    "formula": "C2H6O",
+    "cas": "64-17-5",
+    "hazard_class": "易燃液体",
+    "main_hazards": ["易燃", "刺激\"眼睛\""],
+    "storage": ["阴凉通风处", "远离火源"]
+}
+TEXT = "```json\n" + json.dumps(INFO, ensure_ascii=False, indent=2) + "\n```"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, len(TEXT)])
+def test_fields_emitted_across_chunk_boundaries(chunk_size):
+    parser = IncrementalJSONParser()
+    fields = []
+    for i in range(0, len(TEXT), chunk_size):
+        fields.extend(parser.feed(TEXT[i:i + chunk_size]))
+    assert parser.done
+    assert fields == list(INFO.items())
+    assert parser.close() == INFO
+
+
+def test_field_emitted_before_object_closes():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"chemical_name": {"zh": "乙醇"') == []
+    assert parser.feed('}, "hazard_class": "易燃液体"') == [
+        ("chemical_name", {"zh": "乙醇"}),
+        ("hazard_class", "易燃液体")
+    ]
+    assert not parser.done
+
+
+def test_truncated_string_value_is_dropped():
+    result = parse_json_response('{"formula": "C2H6O", "cas": "64-17-')
+    assert result == {"formula": "C2H6O"}
+
+
+def test_truncated_number_is_dropped():
+    assert parse_json_response('{"a": 1, "b": 12') == {"a": 1}
+
+
+def test_truncated_list_is_dropped():
+    result = parse_json_response('{"cas": "64-17-5", "storage": ["阴凉", "通风处存')
+    assert result == {"cas": "64-17-5"}
+
+
+def test_partial_nested_object_is_dropped():
+    assert parse_json_response('{"a": "x", "b": {"c": "d", "e": "f') == {"a": "x"}
+    assert parse_json_response('{"a": [[1, 2], [3, ') is None
+
+
+def test_half_open_object_in_list_is_dropped():
+    assert parse_json_response('{"items": [{"k": "v"}, {"k"') is None
+
+
+def test_truncated_after_key_drops_member():
+    assert parse_json_response('{"a": "x", "main_hazards": [') == {"a": "x"}
+
+
+def test_repaired_result_is_not_done():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": "x", "b": "y')
+    assert parser.close() == {"a": "x"}
+    assert not parser.done
+
+
+def test_no_json_returns_none():
+    assert parse_json_response("无法识别该化学品") is None
+
+
+def test_malformed_member_is_skipped_and_not_complete():
+    parser = IncrementalJSONParser()
+    fields = parser.feed('{"cas":"64-17-5","main_hazards":["易燃",],"hazard_class":"易燃液体"}')
+    assert fields == [("cas", "64-17-5"), ("hazard_class", "易燃液体")]
+    assert parser.done
+    assert not parser.complete
+    assert parser.close() == {"cas": "64-17-5", "hazard_class": "易燃液体"}
+
+
+def test_trailing_comma_keeps_members():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1,}')
+    assert parser.close() == {"a": 1}
+    assert parser.done
+
+
+def test_raw_newline_in_string():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": "第一行\n第二行", "b": 2}')
+    assert parser.complete
+    assert parser.close() == {"a": "第一行\n第二行", "b": 2}
@@ -0,0 +1,43 @@
+import pytest
+
+from core.prompt_builder import (PromptTemplate, estimate_tokens, expand_compact,
+                                 normalize_ocr_text, truncate_to_budget)
+
+
+@pytest.mark.parametrize("template, expected", [
+    ("分析: {}", "分析: TXT"),
+    ("分析: {0}", "分析: TXT"),
+    ("a {{}} b {}", "a {} b TXT"),
+    ('{{"n": "名称"}} 标签：{}', '{"n": "名称"} 标签：TXT'),
+    ("{0} 和 {0}", "TXT 和 TXT"),
+    ("没有占位符", "没有占位符\nTXT"),
+    ("未闭合 {", "未闭合 {\nTXT"),
+])
+def test_template_placeholders(template, expected):
+    assert PromptTemplate("t", template, input_budget=0).render("TXT") == expected
+
+
+def test_render_normalizes_and_truncates():
+    template = PromptTemplate("t", "{}", input_budget=4)
+    assert template.render("  乙醇\n\n乙醇!!!!!  乙醇 ") == "乙醇 乙"
+
+
+def test_truncate_to_budget_stays_within_budget():
+    text = "中" * 300 + "a" * 5000
+    for budget in (1, 10, 256):
+        result = truncate_to_budget(text, budget)
+        assert estimate_tokens(result) <= budget
+        assert text.startswith(result)
+
+
+def test_normalize_collapses_symbols_and_whitespace():
+    assert normalize_ocr_text("CAS\t64-17-5 ****  易燃") == "CAS 64-17-5 * 易燃"
+
+
+def test_expand_compact():
+    info = expand_compact({"n": ["乙醇", "Ethanol"], "hc": "易燃液体", "fa": ["就医"]})
+    assert info == {
+        "chemical_name": {"zh": "乙醇", "en": "Ethanol"},
+        "hazard_class": "易燃液体",
+        "first_aid": ["就医"]
+    }